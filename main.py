@@ -1,18 +1,44 @@
 import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
 from src.processing.data_processor import parse_afad_asc_file
 
+def to_record(result):
+    """Turn a parse result into an acceleration record with packable samples."""
+    record = dict(result)
+    samples = record.pop('acceleration_data', None)
+    if samples is not None:
+        record['samples'] = np.asarray(samples, dtype=np.float32)
+    return record
+
 def main():
     base_folder = "afad_downloads"
     subfolders = ["data", "data-2"]
+    records = []
 
-    for subfolder in subfolders:
-        folder_path = os.path.join(base_folder, subfolder)
-        for filename in os.listdir(folder_path):
-            if filename.endswith(".asc"):
-                file_path = os.path.join(folder_path, filename)
-                print(f"Parsing {file_path} ...")
-                result = parse_afad_asc_file(file_path)
+    with ProcessPoolExecutor() as executor:
+        for subfolder in subfolders:
+            folder_path = os.path.join(base_folder, subfolder)
+            with os.scandir(folder_path) as entries:
+                file_paths = [entry.path for entry in entries
+                              if entry.name.endswith(".asc") and entry.is_file()]
+            for file_path, result in zip(file_paths, executor.map(parse_afad_asc_file, file_paths, chunksize=8)):
+                print(f"Parsed {file_path}")
                 print(result['metadata']['EVENT_NAME'], "parsed successfully")
+                records.append(to_record(result))
+
+    # Store everything in one batched write when a database is configured,
+    # either in the environment or in .env like DatabaseManager expects
+    load_dotenv()
+    if records and os.getenv("MONGODB_URI"):
+        from src.database.db_manager import DatabaseManager
+        db = DatabaseManager()
+        try:
+            db.insert_acceleration_records_bulk(records)
+            print(f"Stored {len(records)} records in MongoDB")
+        finally:
+            db.close()
 
 if __name__ == "__main__":
     main()
@@ -184,12 +184,16 @@ async function insertEarthquakeDataWithPreprocessing(parsedData) {
   );
 
   // 2. Insert/Update Station Document
+  const stationLat = parseFloat(parsedData.header['STATION_LATITUDE_DEGREE']) || 0;
+  const stationLon = parseFloat(parsedData.header['STATION_LONGITUDE_DEGREE']) || 0;
   const stationDoc = {
     station_id: parsedData.header['STATION_CODE'] || '',
     event_id: generatedEventId,
     name: parsedData.header['STATION_NAME'] || '',
-    latitude: parseFloat(parsedData.header['STATION_LATITUDE_DEGREE']) || 0,
-    longitude: parseFloat(parsedData.header['STATION_LONGITUDE_DEGREE']) || 0,
+    latitude: stationLat,
+    longitude: stationLon,
+    // GeoJSON point for the 2dsphere index used by proximity queries
+    location: { type: 'Point', coordinates: [stationLon, stationLat] },
     geology: parsedData.header['SITE_CLASSIFICATION_EC8'] || '',
     site_class: parsedData.header['MORPHOLOGIC_CLASSIFICATION'] || '',
     distance_to_epicenter: parsedData.epicentralDistance,
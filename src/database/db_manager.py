@@ -1,6 +1,12 @@
 #db_manager.py
-from pymongo import MongoClient
+from pymongo import MongoClient, IndexModel
+from pymongo.cursor import Cursor
+from bson.binary import Binary, USER_DEFINED_SUBTYPE
+import numpy as np
 import logging
+import threading
+import math
+import numbers
 from typing import Dict, List, Optional, Any
 import os
 from dotenv import load_dotenv
@@ -8,6 +14,82 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+# Fields returned by search_earthquakes_by_parameters
+EARTHQUAKE_SUMMARY_PROJECTION = {"_id": 1, "magnitude": 1, "date": 1, "region": 1, "depth": 1}
+
+# One MongoClient per connection string, never evicted: a dropped client
+# would keep its pool and monitor threads alive until closed
+_clients: Dict[str, MongoClient] = {}
+_clients_lock = threading.Lock()
+
+
+def _get_client(connection_string: str) -> MongoClient:
+    """
+    Return a process-wide MongoClient for the connection string.
+    
+    MongoClient owns a connection pool and monitor threads, so it is shared
+    between DatabaseManager instances instead of being built per instance.
+    zstd comes from the zstandard package in requirements.txt; zlib is in
+    the standard library. pymongo warns about any listed compressor that is
+    not installed, so only these two are requested.
+    """
+    with _clients_lock:
+        if connection_string not in _clients:
+            _clients[connection_string] = MongoClient(
+                connection_string,
+                maxPoolSize=200,
+                minPoolSize=20,
+                retryWrites=True,
+                w=1,
+                compressors="zstd,zlib"
+            )
+        return _clients[connection_string]
+
+def _pack_samples(arr: np.ndarray) -> Binary:
+    """
+    Encode acceleration samples as raw little-endian float32 bytes.
+    
+    A BSON array spends ~20 bytes per double sample; the packed form uses 4.
+    """
+    return Binary(np.ascontiguousarray(arr, dtype='<f4').tobytes(), subtype=USER_DEFINED_SUBTYPE)
+
+
+def _unpack_samples(b: bytes, n: Optional[int] = None) -> np.ndarray:
+    """
+    Decode samples written by _pack_samples, optionally only the first n.
+    """
+    return np.frombuffer(b, dtype='<f4', count=-1 if n is None else n)
+
+
+def _with_packed_samples(record_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return a copy of an acceleration record with its samples packed.
+    """
+    samples = record_data.get("samples")
+    if samples is None or isinstance(samples, (bytes, Binary)):
+        return record_data
+    return {**record_data, "samples": _pack_samples(samples)}
+
+
+def _with_location(station_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return a copy of a station document with a GeoJSON point built from its
+    latitude/longitude, for the 2dsphere index.
+    
+    Documents without usable numeric coordinates are returned unchanged
+    rather than given a point the 2dsphere index would reject.
+    """
+    if "location" in station_data:
+        return station_data
+    lat, lon = station_data.get("latitude"), station_data.get("longitude")
+    if not all(isinstance(v, numbers.Real) and not isinstance(v, bool) and math.isfinite(v) for v in (lat, lon)):
+        return station_data
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return station_data
+    point = {"type": "Point", "coordinates": [float(lon), float(lat)]}
+    return {**station_data, "location": point}
+
+
 class DatabaseManager:
     """
     Manages database connections and operations for earthquake data using MongoDB Atlas.
@@ -29,7 +111,7 @@ class DatabaseManager:
                 raise ValueError("MongoDB connection string not provided and MONGODB_URI environment variable not set")
         
         try:
-            self.client = MongoClient(connection_string)
+            self.client = _get_client(connection_string)
             self.db = self.client["earthquake_data"]
             self.earthquake_collection = self.db["earthquakes"]
             self.station_collection = self.db["stations"]
@@ -38,6 +120,66 @@ class DatabaseManager:
         except Exception as e:
             self.logger.error(f"Failed to connect to MongoDB: {str(e)}")
             raise
+        
+        self._ensure_indexes()
+    
+    def _ensure_indexes(self):
+        """
+        Create the indexes backing the find_* and search query shapes.
+        
+        create_index is a no-op for indexes that already exist, so this is
+        safe to run on every connection. Each index is created on its own so
+        one that cannot be built (e.g. a unique index over existing
+        duplicates) does not keep the others from being created.
+        """
+        indexes = [
+            (self.earthquake_collection, IndexModel([("magnitude", 1), ("date", 1)])),
+            (self.earthquake_collection, IndexModel([("region", 1)])),
+            (self.earthquake_collection, IndexModel([("depth", 1)])),
+            (self.earthquake_collection, IndexModel([("date", -1)])),
+            (self.station_collection, IndexModel([("earthquake_id", 1)])),
+            (self.station_collection, IndexModel([("location", "2dsphere")])),
+            # Only documents written with an earthquake_id take part in uniqueness
+            (self.records_collection, IndexModel(
+                [("station_id", 1), ("earthquake_id", 1)],
+                unique=True,
+                partialFilterExpression={"earthquake_id": {"$exists": True}}
+            ))
+        ]
+        for collection, index in indexes:
+            try:
+                collection.create_indexes([index])
+            except Exception as e:
+                self.logger.warning(f"Could not create index {index.document['name']} on {collection.name}: {str(e)}")
+    
+    def backfill_station_locations(self) -> int:
+        """
+        Add the GeoJSON 'location' point to stations that only have latitude/longitude.
+        
+        Stations written before locations were stored (or by older ingest
+        scripts) are otherwise invisible to find_stations_near. This is a
+        one-off migration and is not run on connect; call it once against an
+        existing database. Only stations with numeric, in-range coordinates
+        get a point, so bad rows cannot break the 2dsphere index.
+        
+        Returns:
+            The number of station documents updated
+        """
+        try:
+            result = self.station_collection.update_many(
+                {
+                    "location": {"$exists": False},
+                    "latitude": {"$type": "number", "$gte": -90, "$lte": 90},
+                    "longitude": {"$type": "number", "$gte": -180, "$lte": 180}
+                },
+                [{"$set": {"location": {"type": "Point", "coordinates": ["$longitude", "$latitude"]}}}]
+            )
+            if result.modified_count:
+                self.logger.info(f"Backfilled location for {result.modified_count} stations")
+            return result.modified_count
+        except Exception as e:
+            self.logger.error(f"Error backfilling station locations: {str(e)}")
+            raise
     
     def insert_earthquake(self, earthquake_data: Dict[str, Any]) -> str:
         """
@@ -62,13 +204,14 @@ class DatabaseManager:
         Insert station data into the database.
         
         Args:
-            station_data: Dictionary containing station information
+            station_data: Dictionary containing station information. If it has
+                latitude and longitude, a GeoJSON 'location' point is added.
             
         Returns:
             The ID of the inserted document
         """
         try:
-            result = self.station_collection.insert_one(station_data)
+            result = self.station_collection.insert_one(_with_location(station_data))
             self.logger.info(f"Inserted station with ID: {result.inserted_id}")
             return str(result.inserted_id)
         except Exception as e:
@@ -80,37 +223,125 @@ class DatabaseManager:
         Insert acceleration record data into the database.
         
         Args:
-            record_data: Dictionary containing acceleration record data
+            record_data: Dictionary containing acceleration record data. The
+                signal goes in record_data['samples'] as a numpy array and is
+                stored as packed float32 binary.
             
         Returns:
             The ID of the inserted document
         """
         try:
-            result = self.records_collection.insert_one(record_data)
+            result = self.records_collection.insert_one(_with_packed_samples(record_data))
             self.logger.info(f"Inserted acceleration record with ID: {result.inserted_id}")
             return str(result.inserted_id)
         except Exception as e:
             self.logger.error(f"Error inserting acceleration record: {str(e)}")
             raise
     
-    def find_earthquakes(self, query: Dict[str, Any], limit: int = 100) -> List[Dict[str, Any]]:
+    def _insert_many(self, collection, docs: List[Dict[str, Any]], batch: int, label: str) -> List[str]:
+        """
+        Insert documents in unordered batches of insert_many calls.
+        
+        Args:
+            collection: Target collection
+            docs: Documents to insert
+            batch: Maximum number of documents sent per round trip
+            label: Document kind used in log messages
+            
+        Returns:
+            The IDs of the inserted documents
+        """
+        inserted_ids = []
+        try:
+            for i in range(0, len(docs), batch):
+                result = collection.insert_many(docs[i:i + batch], ordered=False)
+                inserted_ids.extend(str(_id) for _id in result.inserted_ids)
+            self.logger.info(f"Inserted {len(inserted_ids)} {label} documents")
+            return inserted_ids
+        except Exception as e:
+            self.logger.error(f"Error bulk inserting {label} data: {str(e)}")
+            raise
+    
+    def insert_earthquakes_bulk(self, docs: List[Dict[str, Any]], batch: int = 1000) -> List[str]:
+        """
+        Insert many earthquake documents with batched insert_many calls.
+        
+        Args:
+            docs: List of dictionaries containing earthquake information
+            batch: Maximum number of documents sent per round trip
+            
+        Returns:
+            The IDs of the inserted documents
+        """
+        return self._insert_many(self.earthquake_collection, docs, batch, "earthquake")
+    
+    def insert_stations_bulk(self, docs: List[Dict[str, Any]], batch: int = 1000) -> List[str]:
+        """
+        Insert many station documents with batched insert_many calls.
+        
+        Args:
+            docs: List of dictionaries containing station information, located
+                as in insert_station
+            batch: Maximum number of documents sent per round trip
+            
+        Returns:
+            The IDs of the inserted documents
+        """
+        docs = [_with_location(doc) for doc in docs]
+        return self._insert_many(self.station_collection, docs, batch, "station")
+    
+    def insert_acceleration_records_bulk(self, docs: List[Dict[str, Any]], batch: int = 1000) -> List[str]:
+        """
+        Insert many acceleration records with batched insert_many calls.
+        
+        Args:
+            docs: List of dictionaries containing acceleration record data,
+                with samples packed as in insert_acceleration_record
+            batch: Maximum number of documents sent per round trip
+            
+        Returns:
+            The IDs of the inserted documents
+        """
+        docs = [_with_packed_samples(doc) for doc in docs]
+        return self._insert_many(self.records_collection, docs, batch, "acceleration record")
+    
+    def find_earthquakes(self, query: Dict[str, Any], limit: int = 100,
+                         projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Search for earthquakes matching the query.
         
         Args:
             query: Dictionary with search parameters
             limit: Maximum number of results to return
+            projection: Fields to return. If None, whole documents are returned.
             
         Returns:
             List of matching earthquake documents
         """
         try:
-            cursor = self.earthquake_collection.find(query).limit(limit)
-            return list(cursor)
+            return list(self.iter_earthquakes(query, limit, projection))
         except Exception as e:
             self.logger.error(f"Error searching earthquakes: {str(e)}")
             raise
     
+    def iter_earthquakes(self, query: Dict[str, Any], limit: int = 0,
+                         projection: Optional[Dict[str, Any]] = None) -> Cursor:
+        """
+        Lazily iterate over earthquakes matching the query.
+        
+        Documents are fetched in batches as the cursor is consumed, so bulk
+        consumers never hold the whole result set in memory.
+        
+        Args:
+            query: Dictionary with search parameters
+            limit: Maximum number of results to return, 0 for no limit
+            projection: Fields to return. If None, whole documents are returned.
+            
+        Returns:
+            A pymongo cursor over the matching earthquake documents
+        """
+        return self.earthquake_collection.find(query, projection=projection).limit(limit).batch_size(500)
+    
     def find_earthquake_by_id(self, earthquake_id: str) -> Optional[Dict[str, Any]]:
         """
         Find an earthquake by its ID.
@@ -144,6 +375,33 @@ class DatabaseManager:
             self.logger.error(f"Error finding stations for earthquake: {str(e)}")
             raise
     
+    def find_stations_near(self, lon: float, lat: float, max_m: float, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Find stations within a distance of a point, nearest first.
+        
+        Args:
+            lon: Longitude of the point, e.g. an epicenter
+            lat: Latitude of the point
+            max_m: Maximum distance in meters
+            limit: Maximum number of results to return
+            
+        Returns:
+            List of station documents ordered by distance
+        """
+        try:
+            query = {
+                "location": {
+                    "$nearSphere": {
+                        "$geometry": {"type": "Point", "coordinates": [lon, lat]},
+                        "$maxDistance": max_m
+                    }
+                }
+            }
+            return list(self.station_collection.find(query).limit(limit))
+        except Exception as e:
+            self.logger.error(f"Error finding stations near point: {str(e)}")
+            raise
+    
     def find_acceleration_records(self, station_id: str, earthquake_id: str) -> Optional[Dict[str, Any]]:
         """
         Find acceleration records for a specific station and earthquake.
@@ -153,13 +411,17 @@ class DatabaseManager:
             earthquake_id: The ID of the earthquake
             
         Returns:
-            The acceleration record document or None if not found
+            The acceleration record document or None if not found. Packed
+            samples are decoded back into a float32 numpy array.
         """
         try:
-            return self.records_collection.find_one({
+            record = self.records_collection.find_one({
                 "station_id": station_id,
                 "earthquake_id": earthquake_id
             })
+            if record is not None and isinstance(record.get("samples"), bytes):
+                record["samples"] = _unpack_samples(record["samples"])
+            return record
         except Exception as e:
             self.logger.error(f"Error finding acceleration records: {str(e)}")
             raise
@@ -187,7 +449,8 @@ class DatabaseManager:
             limit: Maximum results to return
             
         Returns:
-            List of matching earthquake documents
+            List of matching earthquake documents, limited to the
+            EARTHQUAKE_SUMMARY_PROJECTION fields
         """
         query = {}
         
@@ -219,10 +482,15 @@ class DatabaseManager:
             if depth_max is not None:
                 query["depth"]["$lte"] = depth_max
         
-        return self.find_earthquakes(query, limit)
+        return self.find_earthquakes(query, limit, projection=EARTHQUAKE_SUMMARY_PROJECTION)
     
     def close(self):
-        """Close the MongoDB connection."""
+        """
+        Release this manager's handle on the MongoDB connection.
+        
+        The underlying client is shared through _get_client and stays open for
+        other DatabaseManager instances; pymongo closes it at interpreter exit.
+        """
         if hasattr(self, 'client'):
-            self.client.close()
-            self.logger.info("MongoDB connection closed")
\ No newline at end of file
+            del self.client
+            self.logger.info("MongoDB connection released")
\ No newline at end of file
@@ -0,0 +1,33 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional
+    njit = None
+
+if njit is not None:
+    @njit(cache=True)
+    def _peak_abs(signal):
+        # Single pass, no temporary array
+        peak = 0.0
+        for i in range(signal.size):
+            v = abs(signal[i])
+            if v != v:
+                # NaN, like np.max: a corrupt record must not yield a plausible PGA
+                return v
+            if v > peak:
+                peak = v
+        return peak
+else:
+    def _peak_abs(signal):
+        # Two reductions instead of materializing np.abs(signal)
+        return max(signal.max(), -signal.min())
+
+def peak_abs(signal: np.ndarray) -> float:
+    """
+    Peak absolute value of a 1-D signal, e.g. PGA of an accelerogram
+    """
+    if signal.size == 0:
+        return 0.0
+    # asarray turns memmaps into plain views without copying
+    return float(_peak_abs(np.asarray(signal)))
@@ -31,9 +31,22 @@ class EarthquakeAPI:
 # Global API client instance
 api = EarthquakeAPI()
 =======
+import asyncio
 from typing import Dict, List, Optional, Any
+import httpx
 import numpy as np
 
+# Per-station analysis endpoints, run together by run_all_analyses
+ANALYSIS_ENDPOINTS = {
+    'fourier': '/api/analysis/fourier',
+    'response_spectrum': '/api/analysis/response-spectrum',
+    'pga_pgv_pgd': '/api/analysis/pga-pgv-pgd',
+    'arias_intensity': '/api/analysis/arias-intensity',
+    'bracketed_duration': '/api/analysis/bracketed-duration',
+    'site_frequency': '/api/analysis/site-frequency',
+    'wave_arrivals': '/api/analysis/wave-arrivals'
+}
+
 class AFADAPIClient:
     """
     Client for communicating with Node.js backend API
@@ -41,32 +54,63 @@ class AFADAPIClient:
     
     def __init__(self, base_url: str = "http://localhost:3000"):
         self.base_url = base_url
-        self.session = requests.Session()
-        self.session.headers.update({'Content-Type': 'application/json'})
+        self.headers = {'Content-Type': 'application/json'}
+        # One persistent connection pool, HTTP/2 where the server supports it
+        self.session = httpx.Client(http2=True, base_url=base_url, headers=self.headers, timeout=30)
+        # Async pool shared by run_all_analyses calls between aopen() and aclose()
+        self.async_session = None
+        self._async_loop = None
+    
+    def _new_async_session(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(http2=True, base_url=self.base_url, headers=self.headers, timeout=30)
+    
+    async def aopen(self):
+        """
+        Keep one async connection pool open for run_all_analyses on the running loop
+        Callers with a long-lived event loop pair this with aclose()
+        """
+        if self.async_session is None:
+            self.async_session = self._new_async_session()
+            self._async_loop = asyncio.get_running_loop()
+    
+    async def aclose(self):
+        """
+        Close the async connection pool opened by aopen()
+        """
+        if self.async_session is not None:
+            await self.async_session.aclose()
+            self.async_session = None
+            self._async_loop = None
     
     def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Optional[Dict]:
         """
         Make HTTP request to API
         """
-        url = f"{self.base_url}{endpoint}"
-        
         try:
             if method.upper() == 'GET':
-                response = self.session.get(url, params=data)
+                response = self.session.get(endpoint, params=data)
             elif method.upper() == 'POST':
-                response = self.session.post(url, json=data)
+                response = self.session.post(endpoint, json=data)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
-            response.raise_for_status()
-            return response.json()
+            return self._parse_response(response)
             
-        except requests.exceptions.ConnectionError:
+        except httpx.ConnectError:
             print(f"⚠️ Cannot connect to API server at {self.base_url}")
             return None
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             print(f"❌ API request failed: {e}")
             return None
+    
+    @staticmethod
+    def _parse_response(response: httpx.Response) -> Optional[Dict]:
+        """
+        Check status and decode JSON body
+        """
+        response.raise_for_status()
+        try:
+            return response.json()
         except json.JSONDecodeError:
             print("❌ Invalid JSON response from API")
             return None
@@ -197,6 +241,42 @@ class AFADAPIClient:
             data['station_code'] = station_code
         
         return self._make_request('POST', '/api/analysis/wave-arrivals', data)
+    
+    async def run_all_analyses(self, event_id: str, station_code: str = None, direction: str = 'N', threshold: float = 0.05) -> Dict[str, Optional[Dict]]:
+        """
+        Run every analysis endpoint for one station concurrently
+        Returns a dict keyed like ANALYSIS_ENDPOINTS, None for failed requests
+        """
+        data = {
+            'event_id': event_id,
+            'direction': direction
+        }
+        if station_code:
+            data['station_code'] = station_code
+        
+        async def post(client: httpx.AsyncClient, name: str, endpoint: str) -> Optional[Dict]:
+            payload = dict(data, threshold=threshold) if name == 'bracketed_duration' else data
+            try:
+                return self._parse_response(await client.post(endpoint, json=payload))
+            except httpx.ConnectError:
+                print(f"⚠️ Cannot connect to API server at {self.base_url}")
+                return None
+            except httpx.HTTPError as e:
+                print(f"❌ API request failed: {e}")
+                return None
+        
+        async def post_all(client: httpx.AsyncClient) -> List[Optional[Dict]]:
+            return await asyncio.gather(*(post(client, name, endpoint)
+                                          for name, endpoint in ANALYSIS_ENDPOINTS.items()))
+        
+        # A client's connections belong to the loop it was opened on, so the
+        # shared pool is only used from that loop; otherwise open one per call
+        if self.async_session is not None and self._async_loop is asyncio.get_running_loop():
+            results = await post_all(self.async_session)
+        else:
+            async with self._new_async_session() as client:
+                results = await post_all(client)
+        return dict(zip(ANALYSIS_ENDPOINTS, results))
 
 # Global API client instance
 api_client = AFADAPIClient()
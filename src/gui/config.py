@@ -1,10 +1,15 @@
 import os
+import pathlib
 
 # Project root directory
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # AFAD data paths
 AFAD_DOWNLOADS_PATH = os.path.join(PROJECT_ROOT, "afad_downloads", "data")
+AFAD_DATA_ROOT = pathlib.Path(AFAD_DOWNLOADS_PATH)
+
+# Parsed .asc samples, kept out of the data folders
+ASC_CACHE_PATH = os.path.join(PROJECT_ROOT, ".cache", "asc")
 
 # File patterns for different directions
 DIRECTION_PATTERNS = {
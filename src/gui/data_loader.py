@@ -1,76 +1,322 @@
 import numpy as np
 import pandas as pd
 import os
+import functools
+import mmap
+import bz2
+import gzip
+import tempfile
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, List, Tuple
+try:
+    import zstandard
+except ImportError:  # .asc.zst support is optional
+    zstandard = None
 from file_utils import (
     get_event_files_by_direction, 
     find_file_for_station_direction,
     get_station_codes_for_event,
+    extract_station_code_from_filename,
     discover_event_files
 )
-from config import MAX_SAMPLES, SAMPLING_RATE
+from _kernels import peak_abs
+from config import AFAD_DATA_ROOT, ASC_CACHE_PATH, DIRECTION_PATTERNS, MAX_SAMPLES, SAMPLING_RATE
+
+# First bytes that can start a sample line, as ints since bytes/mmap indexing yields ints
+_NUMERIC_LEAD = frozenset(b'0123456789+-.')
+_BLANK_LEAD = frozenset(b' \t')
+
+# Columns of get_all_events_dataframe, in get_event_metadata order
+EVENT_COLUMNS = ['EventID', 'Date', 'Time', 'Province', 'District', 'Latitude', 'Longitude',
+                 'Magnitude', 'Depth', 'StationCount', 'Stations']
+
+# Columns of get_stations_dataframe
+STATION_COLUMNS = ['EventID', 'Code', 'Latitude', 'Longitude', 'Province', 'District',
+                   'Litology', 'Vs30', 'Morphology', 'PGA_NS', 'PGA_EW', 'PGA_UD']
+
+# Openers for compressed ASCII downloads, keyed by file extension
+_DECOMPRESSORS = {'.gz': gzip.open, '.bz2': bz2.open}
+if zstandard is not None:
+    _DECOMPRESSORS['.zst'] = zstandard.open
+
+@functools.lru_cache(maxsize=32)
+def _time_vector(signal_length: int, sampling_rate: int) -> np.ndarray:
+    # linspace gives exactly signal_length points, unlike a float-step arange
+    t = np.linspace(0.0, (signal_length - 1) / sampling_rate, signal_length, dtype=np.float32)
+    t.flags.writeable = False
+    return t
+
+def _quantize(signal: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Scale a signal onto int16 so that its peak maps to +/-32767
+
+    Signals holding NaN or inf have no usable peak and are kept as float32.
+    """
+    peak = peak_abs(signal)
+    if not np.isfinite(peak):
+        return signal.astype(np.float32), 1.0
+    scale = peak / 32767 if peak > 0 else 1.0
+    return np.round(signal / scale).astype(np.int16), scale
+
+def _dequantize(quantized: np.ndarray, scale: float) -> np.ndarray:
+    return quantized.astype(np.float32) * np.float32(scale)
 
 class AFADDataLoader:
     def __init__(self):
         self.events_cache = {}
         self.stations_cache = {}
+        self.signals_cache = {}
+        self.files_cache = {}
+        self._watched_dirs = None
+        self._dir_mtimes = None
+    
+    @staticmethod
+    def _mtimes(dirs: List[str]) -> Tuple:
+        stamps = []
+        for path in dirs:
+            try:
+                stamps.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                stamps.append(None)
+        return tuple(stamps)
+    
+    def refresh(self):
+        """
+        Rediscover events and drop every cache derived from the data folders
+        Files edited in place keep their folder mtime, so call this after such edits
+        """
+        # Adding, removing or renaming a file bumps its folder's mtime, and a
+        # new folder bumps its parent's, so watching every folder catches both
+        self._watched_dirs = [str(AFAD_DATA_ROOT)] + [
+            os.path.join(root, name) for root, dirs, _ in os.walk(AFAD_DATA_ROOT) for name in dirs]
+        self._dir_mtimes = self._mtimes(self._watched_dirs)
+        self.events_cache = discover_event_files()
+        self.stations_cache = {}
+        self.signals_cache = {}
+        self.files_cache = {}
     
-    def load_asc_file(self, filepath: str, max_samples: int = MAX_SAMPLES) -> Optional[np.ndarray]:
+    def _refresh_caches(self):
+        """
+        Refresh when a data folder has changed since the last scan
+        Called once at the start of each public method, never from worker threads
+        """
+        if self._watched_dirs is None or self._mtimes(self._watched_dirs) != self._dir_mtimes:
+            self.refresh()
+    
+    def _discover_events(self) -> Dict:
+        """
+        Cached discover_event_files()
+        """
+        return self.events_cache
+    
+    def _get_station_codes(self, event_id: str) -> List[str]:
+        """
+        Cached get_station_codes_for_event()
+        """
+        if event_id not in self.stations_cache:
+            self.stations_cache[event_id] = get_station_codes_for_event(event_id)
+        return self.stations_cache[event_id]
+    
+    def _get_file_index(self, event_id: str) -> Dict[Tuple[str, str], str]:
+        """
+        Map (station_code, direction) to file path for an event
+        One listing per direction replaces a lookup per station and direction
+        """
+        if event_id not in self.files_cache:
+            index = {}
+            for direction in DIRECTION_PATTERNS:
+                for path in get_event_files_by_direction(event_id, direction):
+                    station_code = extract_station_code_from_filename(path)
+                    if station_code:
+                        index.setdefault((station_code, direction), path)
+            self.files_cache[event_id] = index
+        return self.files_cache[event_id]
+    
+    def load_asc_file(self, filepath: str, max_samples: int = MAX_SAMPLES,
+                      dtype: np.dtype = np.float32, mmap: bool = False) -> Optional[np.ndarray]:
         """
         Load and parse .asc file containing earthquake data
+        dtype=np.float16 halves memory for plotting-only use
+        Returns a writable in-memory array; with mmap=True a cached file comes
+        back instead as a read-only memmap view that is paged in on access
         """
         if not os.path.exists(filepath):
             print(f"❌ File not found: {filepath}")
             return None
         
+        cache = self._cache_path(filepath)
+        try:
+            if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(filepath):
+                data = np.load(cache, mmap_mode='r' if mmap else None)[:max_samples or None]
+                return data if data.dtype == dtype else data.astype(dtype)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable cache {cache}: {e}")
+        
         try:
-            data = []
-            with open(filepath, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith(('EVENT_NAME', 'STATION', '#')):
-                        try:
-                            value = float(line)
-                            data.append(value)
-                        except ValueError:
-                            continue
+            # Parse the whole file so the cache can serve any max_samples
+            data = self._parse_asc(filepath)
             
-            if not data:
+            if data.size == 0:
                 print(f"⚠️ No valid numeric data found in {filepath}")
                 return None
             
-            # Limit samples if needed
-            if max_samples and len(data) > max_samples:
-                data = data[:max_samples]
-            
-            return np.array(data)
+            self._write_cache(cache, data)
+            return data[:max_samples or None].astype(dtype, copy=False)
             
         except Exception as e:
             print(f"❌ Error loading {filepath}: {e}")
             return None
     
+    def _parse_asc(self, filepath: str) -> np.ndarray:
+        """
+        Parse the numeric section of an .asc file into a float32 array
+        Compressed files (.asc.gz, .asc.bz2, .asc.zst) are decompressed in memory
+        """
+        opener = _DECOMPRESSORS.get(os.path.splitext(filepath)[1])
+        if opener is not None:
+            with opener(filepath, 'rb') as f:
+                return self._parse_buffer(f.read())
+        
+        with open(filepath, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return np.empty(0, dtype=np.float32)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return self._parse_buffer(mm)
+    
+    def _parse_buffer(self, buf) -> np.ndarray:
+        """
+        Parse ASC content held in a bytes-like buffer (bytes or mmap)
+        """
+        body = buf[self._find_data_offset(buf):]
+        try:
+            # One C loop over the whole numeric section
+            data = np.fromstring(body, dtype=np.float32, sep='\n')
+        except ValueError:
+            data = None
+        # numpy < 2 only warns on non-numeric text and returns the values read so far
+        if data is not None and data.size == self._count_tokens(body):
+            return data
+        # Stray non-numeric lines in the data section, parse line by line and skip them
+        return self._parse_lines(body.splitlines())
+    
+    @staticmethod
+    def _count_tokens(body: bytes) -> int:
+        """
+        Number of whitespace-separated values in body, i.e. what np.fromstring should decode
+        """
+        blank = np.frombuffer(body, dtype=np.uint8) <= 32
+        if blank.size == 0:
+            return 0
+        return int(not blank[0]) + int(np.count_nonzero(blank[:-1] & ~blank[1:]))
+    
+    @staticmethod
+    def _find_data_offset(buf) -> int:
+        """
+        Byte offset of the first numeric line, i.e. the end of the header
+        """
+        pos, size = 0, len(buf)
+        while pos < size:
+            lead = buf[pos]
+            if lead in _NUMERIC_LEAD:
+                return pos
+            end = buf.find(b'\n', pos)
+            if end == -1:
+                break
+            # Header keys never start with blanks, so only indented lines need a closer look
+            if lead in _BLANK_LEAD:
+                c = buf[pos:end].lstrip()[:1]
+                if c and c[0] in _NUMERIC_LEAD:
+                    return pos
+            pos = end + 1
+        return size
+    
+    @staticmethod
+    def _parse_lines(lines) -> np.ndarray:
+        """
+        Parse numeric lines into a preallocated float32 buffer, skipping the rest
+        """
+        buf = np.empty(MAX_SAMPLES, dtype=np.float32)
+        idx = 0
+        for line in lines:
+            try:
+                value = float(line)
+            except ValueError:
+                continue
+            if idx == buf.size:
+                buf = np.resize(buf, 2 * buf.size)
+            buf[idx] = value
+            idx += 1
+        return buf[:idx]
+    
+    @staticmethod
+    def _cache_path(filepath: str) -> str:
+        """
+        Cache file for an .asc file under ASC_CACHE_PATH
+        The path hash keeps same-named files from different folders apart
+        """
+        digest = hashlib.sha1(os.path.abspath(filepath).encode()).hexdigest()[:12]
+        return os.path.join(ASC_CACHE_PATH, f"{os.path.basename(filepath)}.{digest}.npy")
+    
+    @staticmethod
+    def _write_cache(cache: str, data: np.ndarray):
+        """
+        Save parsed samples to the cache folder, atomically
+        """
+        try:
+            os.makedirs(os.path.dirname(cache), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(suffix='.npy', dir=os.path.dirname(cache))
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.save(f, data)
+                os.replace(tmp, cache)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError as e:
+            # A read-only checkout still works, just without the cache
+            print(f"⚠️ Could not write cache {cache}: {e}")
+    
     def get_event_signal(self, event_id: str, direction: str = 'N', station_code: str = None) -> Optional[np.ndarray]:
         """
         Get earthquake signal for specific event and direction
         If station_code is provided, get data for that specific station
         Otherwise, get first available station
+        Signals are kept in memory as int16 plus a scale factor and returned as float32
         """
-        if station_code:
-            filepath = find_file_for_station_direction(event_id, station_code, direction)
-            if filepath:
-                return self.load_asc_file(filepath)
-        else:
-            # Get first available file for this direction
-            files = get_event_files_by_direction(event_id, direction)
-            if files:
-                return self.load_asc_file(files[0])
+        self._refresh_caches()
+        key = (event_id, direction, station_code)
+        if key not in self.signals_cache:
+            filepath = self._find_signal_file(event_id, direction, station_code)
+            signal = self.load_asc_file(filepath) if filepath else None
+            if signal is None:
+                return None
+            self.signals_cache[key] = _quantize(signal)
         
-        return None
+        return _dequantize(*self.signals_cache[key])
+    
+    def _find_signal_file(self, event_id: str, direction: str, station_code: str = None) -> Optional[str]:
+        """
+        Path of the file holding a station component, or of the first station if none given
+        """
+        if station_code:
+            return (self._get_file_index(event_id).get((station_code, direction))
+                    or find_file_for_station_direction(event_id, station_code, direction))
+        # Get first available file for this direction
+        files = get_event_files_by_direction(event_id, direction)
+        return files[0] if files else None
     
     def get_event_metadata(self, event_id: str) -> Dict:
         """
         Extract metadata from event ID and files
         """
+        self._refresh_caches()
+        return self._event_metadata(event_id)
+    
+    def _event_metadata(self, event_id: str) -> Dict:
+        """
+        get_event_metadata() without the cache freshness check
+        """
         if not event_id:
             return {}
         
@@ -88,7 +334,7 @@ class AFADDataLoader:
             time = "Unknown"
         
         # Get available stations
-        stations = get_station_codes_for_event(event_id)
+        stations = self._get_station_codes(event_id)
         
         return {
             'EventID': event_id,
@@ -108,26 +354,27 @@ class AFADDataLoader:
         """
         Generate events DataFrame from afad_downloads data
         """
-        events = discover_event_files()
-        events_list = []
+        self._refresh_caches()
+        events = self._discover_events()
+        df = pd.DataFrame.from_records(
+            (self._event_metadata(event_id) for event_id in events.keys()),
+            columns=EVENT_COLUMNS
+        )
         
-        for event_id in events.keys():
-            metadata = self.get_event_metadata(event_id)
-            events_list.append(metadata)
-        
-        return pd.DataFrame(events_list)
+        # 'Unknown' becomes NaN
+        for column in ('Magnitude', 'Depth'):
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype(np.float32)
+        return df.astype({column: 'category' for column in ('Province', 'District')})
     
     def get_stations_dataframe(self, event_id: str) -> pd.DataFrame:
         """
         Generate stations DataFrame for a specific event
         """
-        stations = get_station_codes_for_event(event_id)
+        self._refresh_caches()
+        stations = self._get_station_codes(event_id)
         stations_list = []
         
         for i, station_code in enumerate(stations):
-            # Try to get a sample file to extract any metadata
-            sample_file = find_file_for_station_direction(event_id, station_code, 'N')
-            
             station_data = {
                 'EventID': event_id,
                 'Code': station_code,
@@ -142,30 +389,48 @@ class AFADDataLoader:
                 'PGA_EW': 0.0,
                 'PGA_UD': 0.0
             }
-            
-            # Calculate PGA values if files exist
-            for direction, pga_key in [('N', 'PGA_NS'), ('E', 'PGA_EW'), ('U', 'PGA_UD')]:
-                signal = self.get_event_signal(event_id, direction, station_code)
-                if signal is not None:
-                    pga = np.max(np.abs(signal))
-                    station_data[pga_key] = round(pga, 4)
-            
             stations_list.append(station_data)
         
-        return pd.DataFrame(stations_list)
+        # Calculate PGA values if files exist; file reads and parsing release the GIL
+        tasks = [(i, station_code, direction, pga_key)
+                 for i, station_code in enumerate(stations)
+                 for direction, pga_key in [('N', 'PGA_NS'), ('E', 'PGA_EW'), ('U', 'PGA_UD')]]
+        if tasks:
+            self._get_file_index(event_id)  # build once before the workers look it up
+            max_workers = min(32, (os.cpu_count() or 1) * 4, len(tasks))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = executor.map(
+                    lambda t: (t[0], t[3], self._compute_pga(event_id, t[2], t[1])), tasks)
+                for i, pga_key, pga in results:
+                    stations_list[i][pga_key] = round(pga, 4)
+        
+        return pd.DataFrame.from_records(stations_list, columns=STATION_COLUMNS).astype(
+            {column: 'category' for column in ('Province', 'District', 'Litology', 'Morphology')})
+    
+    def _compute_pga(self, event_id: str, direction: str, station_code: str) -> float:
+        """
+        Peak absolute acceleration for one station component, 0.0 if missing
+        Reads the cached memmap directly, so the signal is never copied into RAM
+        """
+        filepath = self._find_signal_file(event_id, direction, station_code)
+        signal = self.load_asc_file(filepath, mmap=True) if filepath else None
+        if signal is None:
+            return 0.0
+        return peak_abs(signal)
     
     def get_time_vector(self, signal_length: int, sampling_rate: int = SAMPLING_RATE) -> np.ndarray:
         """
         Generate time vector for signal
+        The returned array is shared between callers and read-only
         """
-        dt = 1.0 / sampling_rate
-        return np.arange(0, signal_length * dt, dt)[:signal_length]
+        return _time_vector(signal_length, sampling_rate)
     
     def validate_event_exists(self, event_id: str) -> bool:
         """
         Check if event exists in data
         """
-        events = discover_event_files()
+        self._refresh_caches()
+        events = self._discover_events()
         return event_id in events
 
 # Global instance